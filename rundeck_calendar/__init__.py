@@ -10,8 +10,21 @@ except ImportError:
     class NullHandler(logging.Handler):
         def emit(self, record):
             pass
+import collections
+import datetime
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import lxml.etree as etree
+try:  # Optional dependency used to export job schedules
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
 
 
 class RundeckCalendar:
@@ -46,6 +59,7 @@ class RundeckCalendar:
             self.group = group
             self.name = name
             self.project = project
+            self.cron_schedule = None
             if cron_schedule is None:
                 self.second = second if second is not None else '?'
                 self.minute = minute if minute is not None else '?'
@@ -55,19 +69,116 @@ class RundeckCalendar:
                 self.day_of_week = day_of_week if day_of_week is not None else '?'
                 self.year = year if year is not None else '?'
             else:
-                self.logger.debug(self.project + ':' + self.name + ': ' + cron_schedule)
-                cron_sched_split = cron_schedule.split(' ')
-                if len(cron_sched_split) != 7:
-                    self.logger.debug(
-                        'Invalid string supplied for cron_schedule to the RundeckJobSchedule class: %s' % cron_schedule)
-                    raise Exception
-                self.second = cron_sched_split[0]
-                self.minute = cron_sched_split[1]
-                self.hour = cron_sched_split[2]
-                self.day_of_month = cron_sched_split[3]
-                self.month = cron_sched_split[4]
-                self.day_of_week = cron_sched_split[5]
-                self.year = cron_sched_split[6]
+                self.set_cron_schedule(cron_schedule)
+
+        def set_cron_schedule(self, cron_schedule):
+            """
+            Sets the schedule fields of the job from a Quartz cron expression.
+            :param cron_schedule: string containing the 7 fields of the cron expression
+            """
+            self.logger.debug(self.project + ':' + self.name + ': ' + cron_schedule)
+            cron_sched_split = cron_schedule.split()
+            if len(cron_sched_split) != 7:
+                self.logger.debug(
+                    'Invalid string supplied for cron_schedule to the RundeckJobSchedule class: %s' % cron_schedule)
+                raise ValueError('Invalid cron schedule: %s' % cron_schedule)
+            self.cron_schedule = cron_schedule
+            self.second = cron_sched_split[0]
+            self.minute = cron_sched_split[1]
+            self.hour = cron_sched_split[2]
+            self.day_of_month = cron_sched_split[3]
+            self.month = cron_sched_split[4]
+            self.day_of_week = cron_sched_split[5]
+            self.year = cron_sched_split[6]
+
+        MONTH_NAMES = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+        DAY_OF_WEEK_NAMES = ['SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']
+
+        @staticmethod
+        def _parse_cron_field(expression, minimum, maximum, names=None):
+            """
+            Returns the values matched by a field of a Quartz cron expression.
+            :param expression: string containing the cron field (e.g. '*', '0/15', '2-6', 'MON,WED')
+            :param minimum: smallest value allowed for the field
+            :param maximum: largest value allowed for the field
+            :param names: list of names for the values of the field starting at minimum (e.g. month names)
+            :return: sorted list of integers
+            """
+            def to_int(value):
+                if names is not None and value.upper() in names:
+                    return names.index(value.upper()) + minimum
+                try:
+                    return int(value)
+                except ValueError:
+                    raise ValueError('Unsupported value %s in cron field %s' % (value, expression))
+
+            values = set()
+            for part in expression.split(','):
+                if '/' in part:
+                    part, step = part.split('/')
+                    step = int(step)
+                    increment = True
+                else:
+                    step = 1
+                    increment = False
+                if part in ('*', '?'):
+                    first, last = minimum, maximum
+                elif '-' in part:
+                    first, last = [to_int(value) for value in part.split('-')]
+                else:
+                    first = to_int(part)
+                    last = maximum if increment else first
+                if not minimum <= first <= maximum or not minimum <= last <= maximum or step < 1:
+                    raise ValueError('Cron field %s out of range %d-%d' % (expression, minimum, maximum))
+                span = maximum - minimum + 1
+                if last < first:
+                    # Ranges such as FRI-MON or 22-2 wrap around the end of the field
+                    last += span
+                values.update(minimum + (value - minimum) % span for value in range(first, last + 1, step))
+            return sorted(values)
+
+        def get_seconds_of_day(self):
+            """
+            Returns the times of day at which the job is scheduled.
+            :return: sorted list of seconds since midnight
+            """
+            if '?' in (self.second, self.minute, self.hour):
+                raise ValueError('Incomplete schedule for %s:%s' % (self.project, self.name))
+            seconds = self._parse_cron_field(self.second, 0, 59)
+            minutes = self._parse_cron_field(self.minute, 0, 59)
+            hours = self._parse_cron_field(self.hour, 0, 23)
+            return [hour * 3600 + minute * 60 + second for hour in hours for minute in minutes for second in seconds]
+
+        def _get_day_values(self):
+            """
+            Returns the values matched by the year, month, day of month and day of week fields.
+            :return: tuple of lists of integers, days of week numbered from 1 (Sunday) to 7 (Saturday) as in Quartz
+            """
+            return (self._parse_cron_field(self.year, 1970, 2099),
+                    self._parse_cron_field(self.month, 1, 12, self.MONTH_NAMES),
+                    self._parse_cron_field(self.day_of_month, 1, 31),
+                    self._parse_cron_field(self.day_of_week, 1, 7, self.DAY_OF_WEEK_NAMES))
+
+        def get_fire_day_mask(self, calendar):
+            """
+            Returns which days of a calendar the job is scheduled on, without iterating over the days in Python.
+            As in Quartz, a '?' day of month or day of week field is ignored.
+            :param calendar: dictionary of pyarrow integer arrays 'year', 'month', 'day' and 'day_of_week' (1 for
+                             Sunday to 7 for Saturday) describing consecutive days
+            :return: pyarrow boolean array
+            """
+            years, months, days_of_month, days_of_week = self._get_day_values()
+            day_of_month_match = pc.is_in(calendar['day'], value_set=pa.array(days_of_month, pa.int64()))
+            day_of_week_match = pc.is_in(calendar['day_of_week'], value_set=pa.array(days_of_week, pa.int64()))
+            if self.day_of_month == '?':
+                day_match = day_of_week_match
+            elif self.day_of_week == '?':
+                day_match = day_of_month_match
+            else:
+                day_match = pc.and_(day_of_month_match, day_of_week_match)
+            return pc.and_(pc.and_(pc.is_in(calendar['year'], value_set=pa.array(years, pa.int64())),
+                                   pc.is_in(calendar['month'], value_set=pa.array(months, pa.int64()))),
+                           day_match)
 
     class RUNDECKAPIError(Exception):
         """
@@ -91,13 +202,182 @@ class RundeckCalendar:
             """
             return repr((self.status_code, self.response))
 
-    def __init__(self, host, port, api_token, ssl_enabled=True):
+    class RequestScheduler:
+        """
+        Class used to issue requests to the Rundeck API without overloading the Rundeck server.
+
+        Requests are paced by a token bucket, the number of requests in flight is adapted to the observed server
+        latency and error rate (additive increase, multiplicative decrease) and transient failures (429, 5xx and
+        connection errors) are retried with jittered exponential backoff.
+        """
+
+        RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+        # Number of recent successful responses per endpoint over which the baseline (minimum) latency is computed
+        LATENCY_WINDOW = 20
+
+        def __init__(self, rate=10.0, burst=10, min_concurrency=1, max_concurrency=8, latency_tolerance=2.0,
+                     max_retries=5, backoff_base=0.5, backoff_cap=30.0, timeout=60, verify=False):
+            """
+            :param rate: number of requests per second allowed by the token bucket
+            :param burst: maximum number of tokens the bucket can hold
+            :param min_concurrency: lower bound for the number of requests in flight
+            :param max_concurrency: upper bound for the number of requests in flight
+            :param latency_tolerance: factor of the baseline latency above which the concurrency is reduced
+            :param max_retries: number of times a failed request is retried before giving up
+            :param backoff_base: base delay in seconds for the exponential backoff between retries
+            :param backoff_cap: maximum delay in seconds between retries
+            :param timeout: timeout in seconds for a single request
+            :param verify: True if the SSL certificate of the Rundeck server should be verified and False otherwise
+            :return: RequestScheduler object
+            """
+            self.logger = logging.getLogger(__name__)
+            self.rate = float(rate)
+            self.burst = float(burst)
+            self.min_concurrency = min_concurrency
+            self.max_concurrency = max_concurrency
+            self.latency_tolerance = latency_tolerance
+            self.max_retries = max_retries
+            self.backoff_base = backoff_base
+            self.backoff_cap = backoff_cap
+            self.timeout = timeout
+            self.verify = verify
+            self.concurrency = float(min_concurrency)
+            self.in_flight = 0
+            self.baseline_latencies = {}
+            self.average_latencies = {}
+            self._latencies = {}
+            self._last_decrease = None
+            self._tokens = self.burst
+            self._last_refill = time.monotonic()
+            self._bucket_lock = threading.Lock()
+            self._slots = threading.Condition()
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+        def get(self, url, headers=None, endpoint=None):
+            """
+            Issues a GET request, retrying transient failures.
+            :param url: URL to request
+            :param headers: dictionary of HTTP headers to send with the request
+            :param endpoint: name of the API endpoint the latency of the request is compared against, the URL if None
+            :return: requests.Response object of the last attempt
+            """
+            if endpoint is None:
+                endpoint = url
+            attempt = 0
+            while True:
+                self._acquire_slot()
+                self._acquire_token()
+                start = time.monotonic()
+                try:
+                    resp = self.session.get(url, headers=headers, verify=self.verify, timeout=self.timeout)
+                except (requests.exceptions.SSLError, requests.exceptions.ProxyError):
+                    # Configuration errors that retrying cannot fix
+                    self._release_slot(endpoint, start, None)
+                    raise
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    self._release_slot(endpoint, start, None, failed=True)
+                    if attempt >= self.max_retries:
+                        raise
+                    self.logger.warning('Request to %s failed (%s), retrying.' % (url, e))
+                    self._backoff(attempt)
+                    attempt += 1
+                    continue
+                failed = resp.status_code in self.RETRY_STATUS_CODES
+                self._release_slot(endpoint, start, time.monotonic() - start, failed=failed)
+                if not failed or attempt >= self.max_retries:
+                    return resp
+                self.logger.warning('Request to %s returned %s, retrying.' % (url, resp.status_code))
+                self._backoff(attempt, resp.headers.get('Retry-After'))
+                attempt += 1
+
+        def close(self):
+            """
+            Closes the connections held by this scheduler.
+            """
+            self.session.close()
+
+        def _acquire_token(self):
+            """
+            Blocks until a token is available in the token bucket and consumes it.
+            """
+            while True:
+                with self._bucket_lock:
+                    now = time.monotonic()
+                    self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+                    self._last_refill = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                time.sleep(wait)
+
+        def _acquire_slot(self):
+            """
+            Blocks until the number of requests in flight is below the current concurrency limit.
+            """
+            with self._slots:
+                while self.in_flight >= int(self.concurrency):
+                    self._slots.wait()
+                self.in_flight += 1
+
+        def _release_slot(self, endpoint, start, latency, failed=False):
+            """
+            Releases a request slot and adapts the concurrency limit to the outcome of the request.
+
+            Only successful responses feed the latency statistics, which are kept per endpoint since endpoints differ
+            widely in cost. The baseline is the minimum latency over the last LATENCY_WINDOW successful responses of
+            the endpoint. The limit is halved at most once per round trip: responses to requests sent before the last
+            decrease reflect the previous limit and are not counted again.
+            :param endpoint: name of the API endpoint of the request
+            :param start: time.monotonic() at which the request was sent
+            :param latency: duration of the request in seconds or None if no response was received
+            :param failed: True if the request failed with a retryable error and False otherwise
+            """
+            with self._slots:
+                self.in_flight -= 1
+                overloaded = failed
+                if latency is not None and not failed:
+                    latencies = self._latencies.setdefault(endpoint, collections.deque(maxlen=self.LATENCY_WINDOW))
+                    latencies.append(latency)
+                    self.baseline_latencies[endpoint] = min(latencies)
+                    average_latency = self.average_latencies.get(endpoint, latency)
+                    self.average_latencies[endpoint] = 0.8 * average_latency + 0.2 * latency
+                    overloaded = (self.average_latencies[endpoint] >
+                                  self.latency_tolerance * self.baseline_latencies[endpoint])
+                if overloaded:
+                    if self._last_decrease is None or start >= self._last_decrease:
+                        self.concurrency = max(float(self.min_concurrency), self.concurrency / 2)
+                        self._last_decrease = time.monotonic()
+                elif latency is not None:
+                    self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+                self.logger.debug('Request concurrency limit: %.2f' % self.concurrency)
+                self._slots.notify_all()
+
+        def _backoff(self, attempt, retry_after=None):
+            """
+            Sleeps before retrying a request using exponential backoff with full jitter.
+            :param attempt: number of the attempt that failed, starting at 0
+            :param retry_after: value of the Retry-After header sent by the server, if any
+            """
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+            try:
+                delay = max(delay, min(self.backoff_cap, float(retry_after)))
+            except (TypeError, ValueError):
+                pass
+            time.sleep(delay)
+
+    def __init__(self, host, port, api_token, ssl_enabled=True, request_scheduler=None):
         """
         Returns a RundeckCalendar object to represent the schedules of jobs on the Rundeck server
         :param host: FQDN or IP address of the Rundeck server
         :param port: port on which the Rundeck service is listening
         :param api_token: string containing a token used to authenticate with the Rundeck API.
         :param ssl_enabled: True if SSL should be used to establish connection with the Rundeck server and False otherwise.
+        :param request_scheduler: RequestScheduler used to issue requests to the Rundeck API, a default one is created
+                                  (and closed once the schedules are obtained) if None
         :return: RundeckCalendar object
         """
         self.logger = logging.getLogger(__name__)
@@ -105,8 +385,15 @@ class RundeckCalendar:
         self.port = port
         self.api_token = api_token
         self.ssl_enabled = ssl_enabled
-        self.project_names = self._get_project_names()
-        self.rundeck_job_schedules = self._get_rundeck_job_schedules()
+        self.request_scheduler = request_scheduler
+        if request_scheduler is None:
+            self.request_scheduler = self.RequestScheduler()
+        try:
+            self.project_names = self._get_project_names()
+            self.rundeck_job_schedules = self._get_rundeck_job_schedules()
+        finally:
+            if request_scheduler is None:
+                self.request_scheduler.close()
 
     def _get_project_names(self):
         """
@@ -119,7 +406,7 @@ class RundeckCalendar:
             execution_url = 'http://'
         execution_url += self.host + ':' + self.port + '/api/1/projects'
         headers = {'Content-Type': 'application/json', 'X-RunDeck-Auth-Token': self.api_token}
-        resp = requests.get(execution_url, headers=headers, verify=False)
+        resp = self.request_scheduler.get(execution_url, headers=headers, endpoint='projects')
         if resp.status_code not in (204, 200):
             self.logger.error("Failed to obtain list of projects from the API.")
             raise self.RUNDECKAPIError(status_code=resp.status_code, response=resp.text)
@@ -133,20 +420,30 @@ class RundeckCalendar:
                     project_names.append(name.find('name').text)
             return project_names
 
+    def _export_project_jobs(self, project_name):
+        """
+        Issues a request to the Rundeck API to export the jobs of a project.
+        :param project_name: name of the Rundeck project
+        :return: requests.Response object
+        """
+        if self.ssl_enabled:
+            execution_url = 'https://'
+        else:
+            execution_url = 'http://'
+        execution_url += self.host + ':' + self.port + '/api/14/project/%s/jobs/export' % project_name
+        headers = {'Content-Type': 'application/xml', 'X-RunDeck-Auth-Token': self.api_token}
+        return self.request_scheduler.get(execution_url, headers=headers, endpoint='jobs/export')
+
     def _get_rundeck_job_schedules(self):
         """
         Issues requests to the Rundeck API to obtain information regarding scheduled jobs.
         :return: a list of RundeckJobSchedule objects
         """
         rundeck_job_schedules = []
-        for project_name in self.project_names:
-            if self.ssl_enabled:
-                execution_url = 'https://'
-            else:
-                execution_url = 'http://'
-            execution_url += self.host + ':' + self.port + '/api/14/project/%s/jobs/export' % project_name
-            headers = {'Content-Type': 'application/xml', 'X-RunDeck-Auth-Token': self.api_token}
-            resp = requests.get(execution_url, headers=headers, verify=False)
+        # Export the projects concurrently, the request scheduler limits the load put on the Rundeck server
+        with ThreadPoolExecutor(max_workers=self.request_scheduler.max_concurrency) as executor:
+            responses = list(executor.map(self._export_project_jobs, self.project_names))
+        for project_name, resp in zip(self.project_names, responses):
             if resp.status_code not in (204, 200):
                 self.logger.error("Failed to obtain job information from the API for %s project." % project_name)
                 raise self.RUNDECKAPIError(status_code=resp.status_code, response=resp.text)
@@ -172,8 +469,8 @@ class RundeckCalendar:
                                                                            job.find('name').text,
                                                                            project_name)
                         try:
-                            rundeck_job_schedule.cron_schedule = sched.attrib['crontab']
-                        except (AttributeError, KeyError) as e:
+                            rundeck_job_schedule.set_cron_schedule(sched.attrib['crontab'])
+                        except (AttributeError, KeyError, ValueError) as e:
                             try:
                                 rundeck_job_schedule.second = sched.find('time').attrib['seconds']
                             except (AttributeError, KeyError) as e:
@@ -229,3 +526,229 @@ class RundeckCalendar:
             summary += run_sched.day_of_week + ' '
             summary += run_sched.year + '\n'
         return summary
+
+    def _open_table_writer(self, path, schema, file_format):
+        """
+        Returns a writer used to write record batches to a Parquet or Arrow IPC file.
+        :param path: path of the file to write
+        :param schema: pyarrow.Schema of the data written to the file
+        :param file_format: 'parquet' or 'arrow'
+        :return: pyarrow.parquet.ParquetWriter or pyarrow.ipc.RecordBatchFileWriter object
+        """
+        if file_format == 'parquet':
+            return pq.ParquetWriter(path, schema)
+        elif file_format == 'arrow':
+            return ipc.new_file(path, schema)
+        raise ValueError('Unsupported export format: %s' % file_format)
+
+    def _get_job_dictionary_columns(self):
+        """
+        Returns the dictionaries and the per job dictionary indices of the uuid, project, group and name columns.
+        :return: dictionary mapping column names to (dictionary, indices) tuples of pyarrow.Array objects
+        """
+        columns = {}
+        for column in ('uuid', 'project', 'group', 'name'):
+            dictionary = []
+            positions = {}
+            indices = []
+            for run_sched in self.rundeck_job_schedules:
+                value = getattr(run_sched, column)
+                if value is None:
+                    indices.append(None)
+                    continue
+                if value not in positions:
+                    positions[value] = len(dictionary)
+                    dictionary.append(value)
+                indices.append(positions[value])
+            columns[column] = (pa.array(dictionary, pa.string()), pa.array(indices, pa.int32()))
+        return columns
+
+    def export_job_schedules(self, path, file_format='parquet'):
+        """
+        Writes the cron schedules of all the jobs in this "Calendar" to a Parquet or Arrow IPC file.
+        :param path: path of the file to write
+        :param file_format: 'parquet' or 'arrow'
+        """
+        if pa is None:
+            raise ImportError('pyarrow is required to export job schedules')
+        fields = ['cron_schedule', 'second', 'minute', 'hour', 'day_of_month', 'month', 'day_of_week', 'year']
+        schema = pa.schema([(column, pa.dictionary(pa.int32(), pa.string()))
+                            for column in ('uuid', 'project', 'group', 'name')] +
+                           [(field, pa.string()) for field in fields])
+        writer = self._open_table_writer(path, schema, file_format)
+        try:
+            arrays = [pa.DictionaryArray.from_arrays(indices, dictionary)
+                      for dictionary, indices in self._get_job_dictionary_columns().values()]
+            arrays += [pa.array([getattr(run_sched, field) for run_sched in self.rundeck_job_schedules], pa.string())
+                       for field in fields]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _get_calendar(start_date, end_date):
+        """
+        Returns the days between two dates as pyarrow arrays.
+        :param start_date: first day of the calendar (datetime.date)
+        :param end_date: last day of the calendar (datetime.date)
+        :return: dictionary of int64 pyarrow arrays 'year', 'month', 'day', 'day_of_week' (1 for Sunday to 7 for
+                 Saturday) and 'midnight' (local midnight in seconds since the epoch, ignoring the UTC offset)
+        """
+        calendar = {'year': [], 'month': [], 'day': [], 'day_of_week': [], 'midnight': []}
+        epoch_ordinal = datetime.date(1970, 1, 1).toordinal()
+        day = start_date
+        while day <= end_date:
+            calendar['year'].append(day.year)
+            calendar['month'].append(day.month)
+            calendar['day'].append(day.day)
+            calendar['day_of_week'].append((day.isoweekday() % 7) + 1)
+            calendar['midnight'].append((day.toordinal() - epoch_ordinal) * 86400)
+            day += datetime.timedelta(days=1)
+        return dict((key, pa.array(values, pa.int64())) for key, values in calendar.items())
+
+    @staticmethod
+    def _get_utc_offsets(start_date, end_date, tzinfo):
+        """
+        Returns the UTC offsets of a time zone between two dates and the local times at which they take effect.
+        :param start_date: first day to consider (datetime.date)
+        :param end_date: last day to consider (datetime.date)
+        :param tzinfo: datetime.tzinfo of the time zone
+        :return: list of (local time in seconds since the epoch ignoring the UTC offset, offset in seconds) tuples
+        """
+        epoch = datetime.datetime(1970, 1, 1)
+
+        def offset(local_time):
+            return int(tzinfo.utcoffset(epoch + datetime.timedelta(seconds=local_time)).total_seconds())
+
+        midnight = int((datetime.datetime.combine(start_date, datetime.time()) - epoch).total_seconds())
+        offsets = [(midnight, offset(midnight))]
+        for _ in range((end_date - start_date).days + 1):
+            if offset(midnight + 86400) != offsets[-1][1]:
+                # Find the minute at which the offset changes during this day
+                for local_time in range(midnight, midnight + 86400 + 60, 60):
+                    if offset(local_time) != offsets[-1][1]:
+                        offsets.append((local_time, offset(local_time)))
+            midnight += 86400
+        return offsets
+
+    @staticmethod
+    def _get_local_fire_times(midnights, seconds_of_day):
+        """
+        Returns every combination of a day and a time of day, ordered by day then time of day.
+        :param midnights: int64 pyarrow array of local midnights in seconds since the epoch
+        :param seconds_of_day: int64 pyarrow array of times of day in seconds since midnight
+        :return: int64 pyarrow array of local times in seconds since the epoch
+        """
+        times_per_day = len(seconds_of_day)
+        positions = pc.subtract(pc.cumulative_sum(pa.repeat(pa.scalar(1, pa.int64()), len(midnights) * times_per_day)),
+                                1)
+        day_indices = pc.divide(positions, times_per_day)
+        time_indices = pc.subtract(positions, pc.multiply(day_indices, times_per_day))
+        return pc.add(pc.take(midnights, day_indices), pc.take(seconds_of_day, time_indices))
+
+    @staticmethod
+    def _to_utc(local_times, offsets):
+        """
+        Converts local times to UTC, each with the UTC offset in effect at that time.
+        :param local_times: int64 pyarrow array of local times in seconds since the epoch ignoring the UTC offset
+        :param offsets: list of offsets returned by _get_utc_offsets
+        :return: int64 pyarrow array of seconds since the epoch
+        """
+        utc_times = pc.subtract(local_times, offsets[0][1])
+        for local_time, offset in offsets[1:]:
+            utc_times = pc.if_else(pc.greater_equal(local_times, local_time), pc.subtract(local_times, offset),
+                                   utc_times)
+        return utc_times
+
+    def export_fire_times(self, path, start, end, file_format='parquet', tzinfo=None, row_group_size=1048576):
+        """
+        Writes every time a job in this "Calendar" is scheduled to run between start and end to a Parquet or Arrow
+        IPC file, one row per occurrence with int64 fire_time in seconds since the epoch. Fire times are computed
+        with pyarrow a block of days at a time and written in row groups of row_group_size rows, so memory stays
+        bounded regardless of the horizon.
+        :param path: path of the file to write
+        :param start: datetime.datetime from which fire times are included
+        :param end: datetime.datetime before which fire times are included
+        :param file_format: 'parquet' or 'arrow'
+        :param tzinfo: time zone in which the Rundeck server evaluates the schedules, UTC if None
+        :param row_group_size: number of rows written per row group (Parquet) or record batch (Arrow IPC)
+        """
+        if pa is None:
+            raise ImportError('pyarrow is required to export job schedules')
+        if tzinfo is None:
+            tzinfo = datetime.timezone.utc
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=tzinfo)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=tzinfo)
+        start_epoch = int(start.timestamp())
+        end_epoch = int(end.timestamp())
+        # Include the day before and after so that fire times shifted by the UTC offset are not lost
+        start_date = start.astimezone(tzinfo).date() - datetime.timedelta(days=1)
+        end_date = end.astimezone(tzinfo).date() + datetime.timedelta(days=1)
+        calendar = self._get_calendar(start_date, end_date)
+        offsets = self._get_utc_offsets(start_date, end_date, tzinfo)
+        first_midnight = calendar['midnight'][0].as_py() + 86400
+        last_midnight = calendar['midnight'][-1].as_py() - 86400
+        schema = pa.schema([(column, pa.dictionary(pa.int32(), pa.string()))
+                            for column in ('uuid', 'project', 'group', 'name')] +
+                           [('fire_time', pa.int64())])
+        writer = self._open_table_writer(path, schema, file_format)
+        try:
+            columns = self._get_job_dictionary_columns()
+            pending = []
+            pending_rows = 0
+            for job_index, run_sched in enumerate(self.rundeck_job_schedules):
+                try:
+                    seconds_of_day = pa.array(run_sched.get_seconds_of_day(), pa.int64())
+                    midnights = calendar['midnight'].filter(run_sched.get_fire_day_mask(calendar))
+                except ValueError as e:
+                    self.logger.warning('Skipping fire times of %s:%s: %s' % (run_sched.project, run_sched.name, e))
+                    continue
+                days_per_block = max(1, row_group_size // len(seconds_of_day))
+                for block_start in range(0, len(midnights), days_per_block):
+                    block = midnights.slice(block_start, days_per_block)
+                    fire_times = self._to_utc(self._get_local_fire_times(block, seconds_of_day), offsets)
+                    # Only the first and last days of the range can hold fire times outside of it
+                    if block[0].as_py() <= first_midnight or block[-1].as_py() >= last_midnight:
+                        fire_times = fire_times.filter(pc.and_(pc.greater_equal(fire_times, start_epoch),
+                                                               pc.less(fire_times, end_epoch)))
+                    if len(fire_times) == 0:
+                        continue
+                    pending.append((pa.repeat(pa.scalar(job_index, pa.int32()), len(fire_times)), fire_times))
+                    pending_rows += len(fire_times)
+                    while pending_rows >= row_group_size:
+                        job_indices = pa.concat_arrays([job_indices for job_indices, _ in pending])
+                        fire_times = pa.concat_arrays([fire_times for _, fire_times in pending])
+                        self._write_fire_times(writer, schema, columns, job_indices.slice(0, row_group_size),
+                                               fire_times.slice(0, row_group_size), file_format)
+                        # Carry the remaining rows over to the next row group
+                        pending = [(job_indices.slice(row_group_size), fire_times.slice(row_group_size))]
+                        pending_rows -= row_group_size
+            if pending_rows:
+                self._write_fire_times(writer, schema, columns,
+                                       pa.concat_arrays([job_indices for job_indices, _ in pending]),
+                                       pa.concat_arrays([fire_times for _, fire_times in pending]), file_format)
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write_fire_times(writer, schema, columns, job_indices, fire_times, file_format):
+        """
+        Writes a row group of fire times to an open Parquet or Arrow IPC writer.
+        :param writer: writer returned by _open_table_writer
+        :param schema: pyarrow.Schema of the fire times
+        :param columns: dictionary columns returned by _get_job_dictionary_columns
+        :param job_indices: int32 pyarrow array of the index of the job of each fire time
+        :param fire_times: int64 pyarrow array of fire times
+        :param file_format: 'parquet' or 'arrow'
+        """
+        # Every row group shares the same dictionaries so the Arrow IPC file format accepts them
+        arrays = [pa.DictionaryArray.from_arrays(pc.take(indices, job_indices), dictionary)
+                  for dictionary, indices in columns.values()]
+        arrays.append(fire_times)
+        batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+        if file_format == 'parquet':
+            writer.write_table(pa.Table.from_batches([batch]), row_group_size=len(batch))
+        else:
+            writer.write_batch(batch)
@@ -5,6 +5,7 @@ import logging
 import sys
 import getopt
 import configparser
+import datetime
 from rundeck_calendar import RundeckCalendar
 
 # Setup logging
@@ -27,6 +28,10 @@ ARG_VALUES = {"server=": "",
               "apitoken=": "",
               "credentials=": "",
               "logfilepath=": "",
+              "export=": "",
+              "firetimes=": "",
+              "horizon=": "7",
+              "timezone=": "",
               "summary": False
               }
 
@@ -42,6 +47,17 @@ def signal_handler(signal, frame):
     sys.exit(0)
 
 
+def export_format(file_path):
+    """
+    Returns the format in which an export should be written based on the extension of the file.
+    :param file_path: path of the export file
+    :return: 'arrow' or 'parquet'
+    """
+    if os.path.splitext(file_path)[1].lower() in ('.arrow', '.feather', '.ipc'):
+        return 'arrow'
+    return 'parquet'
+
+
 def process_args():
     """
     Handles the parsing of command line arguments to the script and modifies global variable ARG_VALUES accordingly.
@@ -77,12 +93,24 @@ Usage:
     -L <file path> or
     --logfilepath <file path>                Log script output to specified location.
 
+    -E <file path> or                        Exports the job schedules to the specified file. The file is written in
+    --export=<file path>                     Arrow IPC format if its extension is .arrow, .feather or .ipc and in
+                                             Parquet otherwise. Requires pyarrow.
+
+    -F <file path> or                        Exports every fire time of the jobs within the horizon to the specified
+    --firetimes=<file path>                  file. The file format is chosen as for --export.
+
+    --horizon=<days>                         Number of days from now covered by --firetimes. Defaults to 7.
+
+    --timezone=<time zone>                   Time zone in which the Rundeck server evaluates the job schedules used
+                                             by --firetimes (e.g. America/New_York). Defaults to UTC.
+
 
 '''
 
     # Attempt to use getopt for parsing
     try:
-        opt_list, args = getopt.getopt(sys.argv[1:], 'hs:p:a:c:SL:', ARG_VALUES.keys())
+        opt_list, args = getopt.getopt(sys.argv[1:], 'hs:p:a:c:SL:E:F:', ARG_VALUES.keys())
     except getopt.GetoptError:
         os.system('clear')
         print(help_string)
@@ -138,6 +166,44 @@ Usage:
                 print("ERROR: Invalid path (%s) specified for --logfilepath option." % opt[1])
                 sys.exit(1)
             ARG_VALUES['logfilepath='] = opt[1]
+        elif opt[0] in ('-E', '--export', '-F', '--firetimes'):
+            option = '--export' if opt[0] in ('-E', '--export') else '--firetimes'
+            # Do some error checking
+            try:
+                (head, tail) = os.path.split(opt[1])
+                if head != '' and not os.path.isdir(head):
+                    print("ERROR: Invalid path (%s is not a directory) specified for %s option." % (head, option))
+                    sys.exit(1)
+            except Exception as e:
+                print(str(e))
+                print("ERROR: Invalid path (%s) specified for %s option." % (opt[1], option))
+                sys.exit(1)
+            ARG_VALUES[option[2:] + '='] = opt[1]
+        elif opt[0] == '--horizon':
+            # Cron schedules cannot match years after 2099
+            try:
+                horizon = float(opt[1])
+                end = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=horizon)
+            except (ValueError, OverflowError):
+                horizon = 0
+                end = None
+            if horizon <= 0 or end is None or end.year > 2099:
+                print("ERROR: Invalid number of days (%s) specified for --horizon option. The horizon must be "
+                      "positive and end before 2100." % opt[1])
+                sys.exit(1)
+            ARG_VALUES['horizon='] = opt[1]
+        elif opt[0] == '--timezone':
+            try:
+                import zoneinfo
+            except ImportError:
+                print("ERROR: --timezone option requires Python 3.9 or later.")
+                sys.exit(1)
+            try:
+                zoneinfo.ZoneInfo(opt[1])
+            except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+                print("ERROR: Unknown time zone (%s) specified for --timezone option." % opt[1])
+                sys.exit(1)
+            ARG_VALUES['timezone='] = opt[1]
 
             # Make sure we have required arguments.
     if ARG_VALUES['server='] == "":
@@ -154,6 +220,14 @@ Usage:
         print(help_string)
         sys.exit(1)
 
+    # Make sure exports can be written before crawling the Rundeck server.
+    if ARG_VALUES['export='] != "" or ARG_VALUES['firetimes='] != "":
+        try:
+            import pyarrow
+        except ImportError:
+            print("ERROR: pyarrow is required by the --export and --firetimes options.")
+            sys.exit(1)
+
 
 # Register signal handler for Ctrl+C
 signal.signal(signal.SIGINT, signal_handler)
@@ -174,5 +248,20 @@ rundeck_calendar = RundeckCalendar(ARG_VALUES['server='], ARG_VALUES['port='], A
 if ARG_VALUES['summary']:
     LOGGER.info('Rundeck Schedule Summary:\n' + rundeck_calendar.get_schedule_summary())
 
+if not ARG_VALUES['export='] == "":
+    rundeck_calendar.export_job_schedules(ARG_VALUES['export='], export_format(ARG_VALUES['export=']))
+    LOGGER.info('Job schedules exported to %s' % ARG_VALUES['export='])
+
+if not ARG_VALUES['firetimes='] == "":
+    start = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+    end = start + datetime.timedelta(days=float(ARG_VALUES['horizon=']))
+    tzinfo = None
+    if not ARG_VALUES['timezone='] == "":
+        import zoneinfo
+        tzinfo = zoneinfo.ZoneInfo(ARG_VALUES['timezone='])
+    rundeck_calendar.export_fire_times(ARG_VALUES['firetimes='], start, end, export_format(ARG_VALUES['firetimes=']),
+                                       tzinfo=tzinfo)
+    LOGGER.info('Fire times exported to %s' % ARG_VALUES['firetimes='])
+
 LOGGER.info("Script Completed.")
 sys.exit(0)
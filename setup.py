@@ -11,6 +11,7 @@ config = {
     'author_email': 'akumor@users.noreply.github.com',
     'version': '0.1',
     'install_requires': ['requests', 'ConfigParser', 'lxml'],
+    'extras_require': {'export': ['pyarrow']},
     'packages': ['rundeck_calendar'],
     'scripts': [],
     'name': 'rundeck_calendar'
@@ -8,6 +8,17 @@ from docker import Client
 import json
 import requests
 import logging
+import threading
+import time
+import datetime
+import shutil
+import tempfile
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pass
 
 
 class TestRundeckCalendar(unittest.TestCase):
@@ -251,6 +262,352 @@ TestProject:test_job_1: 0 45 12 ? * 2-6 *
         self.assertEqual(rund_cal.get_schedule_summary(), correct_output)
 
 
+class FakeResponse:
+    """
+    Minimal stand-in for requests.Response used to test without a Rundeck server.
+    """
+
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers if headers is not None else {}
+
+
+class FakeSession:
+    """
+    Minimal stand-in for requests.Session that returns canned responses.
+    """
+
+    def __init__(self, responses):
+        """
+        :param responses: list of FakeResponse objects (or exceptions to raise) returned in order, or a function
+                          taking the URL and returning a FakeResponse
+        """
+        self.responses = responses
+        self.urls = []
+        self.closed = False
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        if callable(self.responses):
+            return self.responses(url)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        self.closed = True
+
+
+class TestRequestScheduler(unittest.TestCase):
+    """
+    Tests the RequestScheduler class without a Rundeck server.
+    """
+
+    @staticmethod
+    def make_scheduler(responses, **kwargs):
+        scheduler = rundeck_calendar.RundeckCalendar.RequestScheduler(backoff_base=0, **kwargs)
+        scheduler.session = FakeSession(responses)
+        return scheduler
+
+    def test_retry_then_success(self):
+        """
+        Tests that transient errors are retried until a successful response is received.
+        """
+        scheduler = self.make_scheduler([FakeResponse(503), FakeResponse(429), FakeResponse(200, 'ok')])
+        resp = scheduler.get('http://localhost:4440/api/1/projects')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(scheduler.session.urls), 3)
+        self.assertEqual(scheduler.in_flight, 0)
+
+    def test_connection_error_retried(self):
+        """
+        Tests that connection errors are retried while SSL errors are raised straight away.
+        """
+        scheduler = self.make_scheduler([requests.exceptions.ConnectionError(), FakeResponse(200)])
+        self.assertEqual(scheduler.get('http://localhost:4440/').status_code, 200)
+        scheduler = self.make_scheduler([requests.exceptions.SSLError(), FakeResponse(200)])
+        self.assertRaises(requests.exceptions.SSLError, scheduler.get, 'https://localhost:4443/')
+        self.assertEqual(len(scheduler.session.urls), 1)
+        self.assertEqual(scheduler.in_flight, 0)
+
+    def test_retries_exhausted(self):
+        """
+        Tests that RUNDECKAPIError is raised once the retries are exhausted and the default scheduler is closed.
+        """
+        scheduler = self.make_scheduler([FakeResponse(503, 'unavailable')] * 3, max_retries=2)
+        with self.assertRaises(rundeck_calendar.RundeckCalendar.RUNDECKAPIError) as context:
+            rundeck_calendar.RundeckCalendar('localhost', '4440', 'token', ssl_enabled=False,
+                                             request_scheduler=scheduler)
+        self.assertEqual(context.exception.status_code, 503)
+        self.assertEqual(len(scheduler.session.urls), 3)
+        self.assertFalse(scheduler.session.closed)
+
+    def test_retry_after(self):
+        """
+        Tests that the Retry-After header sets a lower bound on the backoff delay.
+        """
+        scheduler = self.make_scheduler([FakeResponse(429, headers={'Retry-After': '0.2'}), FakeResponse(200)])
+        start = time.monotonic()
+        scheduler.get('http://localhost:4440/')
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def test_concurrency_halved_on_429(self):
+        """
+        Tests that the concurrency limit is halved when the server is throttling and grows back on success.
+        """
+        scheduler = self.make_scheduler([FakeResponse(429), FakeResponse(200)], max_retries=0)
+        scheduler.concurrency = 4.0
+        scheduler.get('http://localhost:4440/')
+        self.assertEqual(scheduler.concurrency, 2.0)
+        scheduler.get('http://localhost:4440/')
+        self.assertEqual(scheduler.concurrency, 2.5)
+
+    def test_failed_response_latency_ignored(self):
+        """
+        Tests that fast error responses do not pin the baseline latency and the baseline follows recent responses.
+        """
+        scheduler = self.make_scheduler(None)
+        scheduler.in_flight = 1
+        scheduler._release_slot('export', time.monotonic(), 0.005, failed=True)
+        self.assertNotIn('export', scheduler.baseline_latencies)
+        for _ in range(20):
+            scheduler.in_flight = 1
+            scheduler._release_slot('export', time.monotonic(), 0.5)
+        self.assertEqual(scheduler.baseline_latencies['export'], 0.5)
+        self.assertGreater(scheduler.concurrency, 4)
+        for _ in range(scheduler.LATENCY_WINDOW):
+            scheduler.in_flight = 1
+            scheduler._release_slot('export', time.monotonic(), 0.001)
+        for _ in range(scheduler.LATENCY_WINDOW):
+            scheduler.in_flight = 1
+            scheduler._release_slot('export', time.monotonic(), 0.5)
+        self.assertEqual(scheduler.baseline_latencies['export'], 0.5)
+
+    def test_decrease_once_per_round_trip(self):
+        """
+        Tests that a burst of throttled responses to concurrent requests halves the concurrency limit only once.
+        """
+        scheduler = self.make_scheduler(None)
+        scheduler.concurrency = 8.0
+        start = time.monotonic()
+        for _ in range(8):
+            scheduler.in_flight = 1
+            scheduler._release_slot('export', start, 0.005, failed=True)
+        self.assertEqual(scheduler.concurrency, 4.0)
+        scheduler.in_flight = 1
+        scheduler._release_slot('export', time.monotonic(), 0.005, failed=True)
+        self.assertEqual(scheduler.concurrency, 2.0)
+
+    def test_mixed_latency_endpoints(self):
+        """
+        Tests that the concurrency limit grows on a healthy server whose endpoints have very different latencies.
+        """
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def respond(url):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.005 if url.endswith('/projects') else 0.05)
+            with lock:
+                in_flight[0] -= 1
+            if url.endswith('/projects'):
+                return FakeResponse(200, '<result><projects>%s</projects></result>' % ''.join(
+                    '<project><name>Project%d</name></project>' % i for i in range(16)))
+            return FakeResponse(200, '<joblist/>')
+
+        scheduler = self.make_scheduler(respond, rate=1000, burst=100)
+        rund_cal = rundeck_calendar.RundeckCalendar('localhost', '4440', 'token', ssl_enabled=False,
+                                                    request_scheduler=scheduler)
+        self.assertEqual(len(rund_cal.project_names), 16)
+        self.assertGreater(scheduler.concurrency, 3)
+        self.assertGreater(in_flight[1], 2)
+
+    def test_token_bucket(self):
+        """
+        Tests that requests beyond the burst are paced at the configured rate.
+        """
+        scheduler = self.make_scheduler(lambda url: FakeResponse(200), rate=20, burst=1)
+        start = time.monotonic()
+        for _ in range(5):
+            scheduler.get('http://localhost:4440/')
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+
+class TestRundeckJobSchedule(unittest.TestCase):
+    """
+    Tests the schedule expansion of the RundeckJobSchedule class.
+    """
+
+    def test_parse_cron_field(self):
+        """
+        Tests the parsing of lists, ranges, steps and names in cron fields.
+        """
+        parse = rundeck_calendar.RundeckCalendar.RundeckJobSchedule._parse_cron_field
+        names = rundeck_calendar.RundeckCalendar.RundeckJobSchedule.DAY_OF_WEEK_NAMES
+        self.assertEqual(parse('*', 0, 23), list(range(24)))
+        self.assertEqual(parse('1,5,3', 0, 59), [1, 3, 5])
+        self.assertEqual(parse('10-12', 0, 59), [10, 11, 12])
+        self.assertEqual(parse('0/15', 0, 59), [0, 15, 30, 45])
+        self.assertEqual(parse('5/1', 0, 59), list(range(5, 60)))
+        self.assertEqual(parse('10-20/5', 0, 59), [10, 15, 20])
+        self.assertEqual(parse('MON-FRI', 1, 7, names), [2, 3, 4, 5, 6])
+        self.assertEqual(parse('FRI-MON', 1, 7, names), [1, 2, 6, 7])
+        self.assertEqual(parse('22-2', 0, 23), [0, 1, 2, 22, 23])
+        for expression in ('L', 'LW', '15W', '6#3', '5L', '60'):
+            self.assertRaises(ValueError, parse, expression, 0, 59)
+
+    @unittest.skipIf(rundeck_calendar.pa is None, 'pyarrow is not installed')
+    def test_get_fire_day_mask(self):
+        """
+        Tests that '?' in the day of month or day of week field makes only the other field apply.
+        """
+        schedule_class = rundeck_calendar.RundeckCalendar.RundeckJobSchedule
+        calendar = rundeck_calendar.RundeckCalendar._get_calendar(datetime.date(2026, 10, 1),
+                                                                  datetime.date(2026, 10, 31))
+
+        def fire_days(cron_schedule):
+            mask = schedule_class('uuid', 'job', 'project', cron_schedule=cron_schedule).get_fire_day_mask(calendar)
+            return calendar['day'].filter(mask).to_pylist()
+
+        self.assertEqual(len(fire_days('0 0 12 ? * MON-FRI *')), 22)
+        self.assertEqual(fire_days('0 0 12 1,15 * ? *'), [1, 15])
+        # Thursday the 1st and the 15th
+        self.assertEqual(fire_days('0 0 12 1,15,16 * THU *'), [1, 15])
+        self.assertEqual(fire_days('0 0 12 * * ? 2027'), [])
+
+
+@unittest.skipIf(rundeck_calendar.pa is None, 'pyarrow is not installed')
+class TestRundeckCalendarExport(unittest.TestCase):
+    """
+    Tests the Parquet and Arrow IPC exports of the RundeckCalendar class without a Rundeck server.
+    """
+
+    PROJECTS = '''<result success='true' apiversion='14'>
+  <projects count='1'>
+    <project><name>TestProject</name></project>
+  </projects>
+</result>'''
+
+    JOBS = '''<joblist>
+  <job>
+    <id>63144201-4c22-4468-92c9-9e56efd530fa</id>
+    <name>test_job_1</name>
+    <group>nightly</group>
+    <schedule>
+      <month month='*' />
+      <time hour='12' minute='45' seconds='0' />
+      <weekday day='2-6' />
+      <year year='*' />
+    </schedule>
+    <scheduleEnabled>true</scheduleEnabled>
+  </job>
+  <job>
+    <id>5b4ef7ad-8e32-4d3c-b4b6-8b7a3ed1c8c0</id>
+    <name>test_job_2</name>
+    <schedule crontab='0 0/30 * ? * * *' />
+    <scheduleEnabled>true</scheduleEnabled>
+  </job>
+</joblist>'''
+
+    def setUp(self):
+        """
+        Prepare to run test.
+        """
+        self.directory = tempfile.mkdtemp()
+        scheduler = rundeck_calendar.RundeckCalendar.RequestScheduler()
+        scheduler.session = FakeSession(
+            lambda url: FakeResponse(200, self.PROJECTS if url.endswith('/projects') else self.JOBS))
+        self.rund_cal = rundeck_calendar.RundeckCalendar('localhost', '4440', 'token', ssl_enabled=False,
+                                                         request_scheduler=scheduler)
+
+    def tearDown(self):
+        """
+        Clean up after running test.
+        """
+        shutil.rmtree(self.directory)
+
+    def read_table(self, path, file_format):
+        if file_format == 'parquet':
+            return pq.read_table(path)
+        return pa.ipc.open_file(path).read_all()
+
+    def test_export_job_schedules(self):
+        """
+        Tests the export_job_schedules method of the RundeckCalendar class, including crontab schedules.
+        """
+        for file_format in ('parquet', 'arrow'):
+            path = os.path.join(self.directory, 'jobs.' + file_format)
+            self.rund_cal.export_job_schedules(path, file_format)
+            table = self.read_table(path, file_format)
+            self.assertEqual(table.schema.field('project').type, pa.dictionary(pa.int32(), pa.string()))
+            rows = table.to_pylist()
+            self.assertEqual([row['name'] for row in rows], ['test_job_1', 'test_job_2'])
+            self.assertEqual(rows[0]['group'], 'nightly')
+            self.assertIsNone(rows[0]['cron_schedule'])
+            self.assertEqual(rows[1]['cron_schedule'], '0 0/30 * ? * * *')
+            self.assertEqual([rows[1][field] for field in ('second', 'minute', 'hour', 'day_of_week')],
+                             ['0', '0/30', '*', '*'])
+
+    def test_export_fire_times(self):
+        """
+        Tests the export_fire_times method of the RundeckCalendar class.
+        """
+        # Monday 2026-10-19 to Monday 2026-10-26: 5 weekday runs and 7 * 48 half-hourly runs
+        start = datetime.datetime(2026, 10, 19)
+        end = datetime.datetime(2026, 10, 26)
+        for file_format in ('parquet', 'arrow'):
+            path = os.path.join(self.directory, 'fire_times.' + file_format)
+            self.rund_cal.export_fire_times(path, start, end, file_format, row_group_size=100)
+            table = self.read_table(path, file_format)
+            for column in ('uuid', 'project', 'group', 'name'):
+                self.assertEqual(table.schema.field(column).type, pa.dictionary(pa.int32(), pa.string()))
+            self.assertEqual(table.schema.field('fire_time').type, pa.int64())
+            self.assertEqual(table.num_rows, 5 + 7 * 48)
+            if file_format == 'parquet':
+                metadata = pq.ParquetFile(path).metadata
+                self.assertEqual([metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)],
+                                 [100, 100, 100, 41])
+            else:
+                self.assertEqual([len(batch) for batch in table.to_batches()], [100, 100, 100, 41])
+            fire_times = [row['fire_time'] for row in table.to_pylist() if row['name'] == 'test_job_1']
+            self.assertEqual(fire_times[0], int(datetime.datetime(2026, 10, 19, 12, 45,
+                                                                  tzinfo=datetime.timezone.utc).timestamp()))
+
+    def test_export_fire_times_both_day_fields(self):
+        """
+        Tests the export of a job with both the day of month and day of week fields restricted.
+        """
+        path = os.path.join(self.directory, 'fire_times.parquet')
+        self.rund_cal.rundeck_job_schedules = [rundeck_calendar.RundeckCalendar.RundeckJobSchedule(
+            'uuid', 'job', 'project', cron_schedule='0 0 12 1,15,16 * THU *')]
+        self.rund_cal.export_fire_times(path, datetime.datetime(2026, 10, 1), datetime.datetime(2026, 11, 1))
+        fire_times = [datetime.datetime.fromtimestamp(row['fire_time'], datetime.timezone.utc)
+                      for row in pq.read_table(path).to_pylist()]
+        self.assertEqual([fire_time.day for fire_time in fire_times], [1, 15])
+
+    def test_export_fire_times_timezone(self):
+        """
+        Tests that fire times use the UTC offset in effect at each time across a DST change.
+        """
+        path = os.path.join(self.directory, 'fire_times.parquet')
+        try:
+            import zoneinfo
+        except ImportError:
+            self.skipTest('zoneinfo requires Python 3.9')
+        tzinfo = zoneinfo.ZoneInfo('Europe/Berlin')
+        self.rund_cal.export_fire_times(path, datetime.datetime(2026, 10, 23), datetime.datetime(2026, 10, 27),
+                                        tzinfo=tzinfo)
+        fire_times = [datetime.datetime.fromtimestamp(row['fire_time'], tzinfo)
+                      for row in pq.read_table(path).to_pylist() if row['name'] == 'test_job_1']
+        self.assertEqual([(fire_time.day, fire_time.hour, fire_time.minute) for fire_time in fire_times],
+                         [(23, 12, 45), (26, 12, 45)])
+        self.assertEqual([fire_time.utcoffset().total_seconds() for fire_time in fire_times], [7200, 3600])
+
+
 if __name__ == '__main__':
     logging.basicConfig(stream=sys.stdout)
     logging.getLogger("TestRundeckCalendar.test_get_schedule_summary").setLevel(logging.DEBUG)